@@ -0,0 +1,109 @@
+#!/bin/python
+
+import xml.etree.ElementTree as ET
+import copy
+from pathlib import Path
+
+
+# In-memory representation of the PhysiCell settings file.
+# The file is parsed exactly once and all Parameter objects referencing it
+# hold handles to elements in this tree instead of re-reading the file.
+# Node structures are compiled into paths of child positions ("index paths")
+# which can be resolved against any copy of the tree without searching.
+class ConfigDocument():
+	def __init__(self, xml_file:Path):
+		self.xml_file = Path(xml_file)
+		try:
+			self.tree = ET.parse(self.xml_file)
+		except:
+			raise ValueError("xml filename or file structure not valid")
+		self.root = self.tree.getroot()
+		# Compiled index paths by node_structure (see compiled_path)
+		self.compiled_paths = {}
+		# Filled by a single walk over the tree when the first node is searched
+		self._children = None
+		self._paths = None
+
+
+	def _build_index(self):
+		'''Walks the tree once and records the children of every element by tag
+		as well as the index path of every element.'''
+		self._children = {}
+		self._paths = {self.root: ()}
+		stack = [self.root]
+		while len(stack) > 0:
+			parent = stack.pop()
+			path = self._paths[parent]
+			children = {}
+			for pos, child in enumerate(parent):
+				children.setdefault(child.tag, []).append(child)
+				self._paths[child] = path + (pos,)
+				stack.append(child)
+			self._children[parent] = children
+
+
+	def find_children(self, node:ET.Element, node_name:str) -> list:
+		'''Equivalent to node.findall(node_name) but uses the tag index for plain tag names.'''
+		if self._children == None:
+			self._build_index()
+		# Anything that looks like an XPath expression is handed to ElementTree
+		if node_name.startswith(".") or any(c in node_name for c in "/[]*@"):
+			return node.findall(node_name)
+		return self._children[node].get(node_name, [])
+
+
+	def path_of(self, node:ET.Element) -> tuple:
+		'''Returns the index path of an element of this document.'''
+		if self._paths == None:
+			self._build_index()
+		return self._paths[node]
+
+
+	def resolve(self, path:tuple) -> ET.Element:
+		'''Follows an index path from the root. Costs O(depth) and works on every copy of the template.'''
+		node = self.root
+		for pos in path:
+			node = node[pos]
+		return node
+
+
+	def compiled_path(self, node_structure:list):
+		'''Returns the index path compiled earlier for an identical node_structure or None.'''
+		return self.compiled_paths.get(repr(node_structure))
+
+
+	def store_compiled_path(self, node_structure:list, path:tuple) -> None:
+		self.compiled_paths[repr(node_structure)] = path
+
+
+	def copy(self):
+		'''Creates an independent copy of the tree without parsing the file again.'''
+		document = ConfigDocument.__new__(ConfigDocument)
+		document.xml_file = self.xml_file
+		document.root = copy.deepcopy(self.root)
+		document.tree = ET.ElementTree(document.root)
+		document.compiled_paths = self.compiled_paths
+		document._children = None
+		document._paths = None
+		return document
+
+
+	def render(self, target:Path, assignments:list) -> None:
+		'''Applies all (param, value) pairs to a copy of the document and serializes it once to target.'''
+		document = self.copy()
+		for param, value in assignments:
+			document.resolve(param.path).text = str(value)
+		document.tree.write(target)
+
+
+	def save(self) -> None:
+		'''Writes the current state of the document back to the file it was read from.'''
+		self.tree.write(self.xml_file)
+
+
+	def __getstate__(self):
+		# The search index is only needed while compiling and can be rebuilt cheaply
+		state = self.__dict__.copy()
+		state["_children"] = None
+		state["_paths"] = None
+		return state
@@ -5,6 +5,8 @@ import warnings
 import os
 from pathlib import Path
 
+from src.ConfigDocument import ConfigDocument
+
 # TODO add a option to have a parameter not be represented in the xml file
 # Example: number of voxels:
 # N_vox = int((x_max-x_min)/dx)+1
@@ -15,28 +17,32 @@ from pathlib import Path
 
 # Parameter class to get and set attributes in xml file
 class Parameter():
-	def __init__(self, param_type:type, xml_file:Path, node_structure:list, logfile:Path=None):
+	def __init__(self, param_type:type, xml_file:Path=None, node_structure:list=None, logfile:Path=None, document:ConfigDocument=None):
 		self.param_type = param_type
 		supported_types = [int, float, str, bool]
 		if not param_type in supported_types:
 			raise TypeError("Parameter type "  + str(param_type) + " currently not supported. Chose from " + " ".join(str(supported_types)))
 		
-		self.xml_file = xml_file
 		self.logfile = logfile
 		self.node_structure = node_structure
-		self.node = self._locate_node_in_xml(xml_file=xml_file, node_structure=node_structure, logfile_name=logfile)
-
-
-	def _update_tree(self):
-		self.node = self._locate_node_in_xml(self.xml_file, self.node_structure)
-
-	def _load_node_structure(self, xml_file:Path):
-		'''Tests if the xml file has obvious errors and loads the tree if valid.'''
-		try:
-			self.tree = ET.parse(xml_file)
-		except:
-			raise ValueError("xml filename or file structure not valid")
-		return self.tree
+		# Parameters created by the Controller share its document and never touch the file themselves.
+		# A standalone parameter owns its document and writes changes back to the file directly.
+		self._owns_document = document == None
+		if document == None:
+			document = self._load_node_structure(xml_file)
+		self.document = document
+		self.tree = document.tree
+		self.xml_file = document.xml_file
+		# Index path of the node in the document. Resolving it against a copy of the document is O(depth).
+		self.path = self._compile_node_structure(node_structure=node_structure, logfile_name=logfile)
+		self.node = self.document.resolve(self.path)
+
+
+	def _load_node_structure(self, xml_file:Path) -> ConfigDocument:
+		'''Tests if the xml file has obvious errors and loads the document if valid.'''
+		if xml_file == None:
+			raise ValueError("Either xml_file or document needs to be supplied")
+		return ConfigDocument(xml_file)
 
 
 	def _locate_node_from_attributes(self, node_name:str, nodes_found, attributes:dict):
@@ -90,8 +96,19 @@ class Parameter():
 		return node_name, index, attributes
 
 
-	def _locate_node_in_xml(self, xml_file:Path, node_structure:list, logfile_name:Path=None):
-		'''Locates node in xml file. The node structure can consist of a simple string 
+	def _compile_node_structure(self, node_structure:list, logfile_name:Path=None) -> tuple:
+		'''Searches the node once and returns its index path. Identical node structures
+		on the same document are only searched for the first time.'''
+		path = self.document.compiled_path(node_structure)
+		if path == None:
+			node = self._locate_node_in_xml(node_structure=node_structure, logfile_name=logfile_name)
+			path = self.document.path_of(node)
+			self.document.store_compiled_path(node_structure, path)
+		return path
+
+
+	def _locate_node_in_xml(self, node_structure:list, logfile_name:Path=None):
+		'''Locates node in the loaded xml document. The node structure can consist of a simple string 
 		(will use first node matching) or a dictionary specifying index or attributes 
 		if multiple nodes with identical tags are present.'''
 		if logfile_name == None:
@@ -99,12 +116,12 @@ class Parameter():
 		else:
 			logfile_file = open(logfile_name, "a")
 		print("[node-search] Locating node for parameter of type " + str(self.param_type) + " and node_structure [" + ' -> '.join([str(n) for n in node_structure]) + "]", file=logfile_file)
-		node = self._load_node_structure(xml_file=xml_file)
+		node = self.document.root
 		for entry in node_structure:
 			node_name, index, attributes = self._getNode_entry_info(entry)
 
 			# Now try to locate node from information obtained above
-			nodes = node.findall(node_name)
+			nodes = self.document.find_children(node, node_name)
 			# Print to logfile if specified
 			for n in nodes:
 				print("[node-search] Found Tags: ", n.tag, file=logfile_file)
@@ -141,9 +158,9 @@ class Parameter():
 		'''Sets the value of the parameter in the xml file.'''
 		if not type(value) == self.param_type:
 			raise TypeError("Supplied value type does not match type definition.")
-		self._update_tree()
 		self.node.text = str(value)
-		self.tree.write(self.xml_file)
+		if self._owns_document:
+			self.document.save()
 		if self.logfile != None:
 			logfile = open(self.logfile, "a")
 			print("[param_set] Set parameter of type " + str(self.param_type) + " with node structure " + str(self.node_structure) + " in xml_file \"" + str(self.xml_file) + "\" to " + str(value), file=logfile)
@@ -152,7 +169,6 @@ class Parameter():
 
 	def get_val(self):
 		'''Gets the value of the parameter in the xml file.'''
-		self._update_tree()
 		if self.param_type != bool:
 			return self.param_type(self.node.text)
 		# This has to be inserted since bool("False")=True in python
@@ -167,13 +183,31 @@ class Parameter():
 
 
 	def update_file_locations(self, xml_file:Path, logfile:Path=None):
-		self.xml_file = xml_file
-		# if not logfile == None:
+		'''Rebinds the parameter to a different xml file which it then owns.'''
 		self.logfile = logfile
-		
-		self._load_node_structure(xml_file)
-		self.node = self._locate_node_in_xml(xml_file=xml_file, node_structure=self.node_structure, logfile_name=logfile)
+		self.document = self._load_node_structure(xml_file)
+		self._owns_document = True
+		self.tree = self.document.tree
+		self.xml_file = self.document.xml_file
+		# Files generated from the same template share the structure so the compiled path can be reused.
+		# If the structure differs we fall back to searching the node again.
+		try:
+			node = self.document.resolve(self.path)
+		except IndexError:
+			node = None
+		if node == None or node.tag != self.node.tag:
+			self.path = self._compile_node_structure(node_structure=self.node_structure, logfile_name=logfile)
+			node = self.document.resolve(self.path)
+		self.node = node
+
+
+	def resolve_in(self, document:ConfigDocument):
+		'''Returns the node of this parameter in a copy of its template document without searching.'''
+		return document.resolve(self.path)
 	
 
 	def __copy__(self):
-		return Parameter(param_type=self.param_type, xml_file=self.xml_file, node_structure=self.node_structure, logfile=self.logfile)
\ No newline at end of file
+		# The compiled path and node handle are shared, no search is necessary.
+		param = Parameter.__new__(Parameter)
+		param.__dict__.update(self.__dict__)
+		return param
\ No newline at end of file
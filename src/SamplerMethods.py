@@ -26,6 +26,14 @@ class SamplerMethod(ABC):
     def generate_combinations(self) -> tuple[list, list]:
         pass
 
+    def generate_factors(self) -> list:
+        '''
+        Returns the combinations of this sampler as a list of (values, param_names) factors
+        whose cartesian product gives generate_combinations(). Samplers building a grid should
+        return one factor per axis so that the grid never needs to be materialized.
+        '''
+        return [self.generate_combinations()]
+
 
 class MonteCarlo_normal(SamplerMethod):
     def __init__(self, N_params):
@@ -95,15 +103,25 @@ class Linear(SamplerMethod):
             warnings.warn("increment of parameter " + str(param_name) + " was chosen to be larger than total range!")
 
     
+    def _param_range(self, info:dict):
+        # TODO this is just a workaround to include upper limits of np.arange.
+        # Defenitely need to find a better way!
+        return np.arange(info["bound_low"], info["bound_high"]+info["increment"]/1e+20, info["increment"])
+
     def generate_combinations(self):
         param_ranges = []
         param_names = []
         for param_name, param, info in self.param_infos:
-            # TODO this is just a workaround to include upper limits of np.arange.
-            # Defenitely need to find a better way!
-            param_ranges.append(np.arange(info["bound_low"], info["bound_high"]+info["increment"]/1e+20, info["increment"]))
+            param_ranges.append(self._param_range(info))
             param_names.append(param_name)
         return list(itertools.product(*param_ranges)), param_names
+
+    def generate_factors(self):
+        # One factor per parameter. The controller builds the grid lazily from these.
+        factors = []
+        for param_name, param, info in self.param_infos:
+            factors.append(([(v,) for v in self._param_range(info)], [param_name]))
+        return factors
     
 
 class Explicit(SamplerMethod):
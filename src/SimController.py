@@ -1,6 +1,6 @@
 #!/bin/python3
 import os
-import itertools
+import threading
 import numpy as np
 from tqdm import tqdm
 import types
@@ -10,6 +10,7 @@ from pathlib import Path
 
 # Import custom modules
 from src.Parameter import Parameter
+from src.ConfigDocument import ConfigDocument
 from src.SamplerMethods import MonteCarlo_normal, Linear, SamplerMethod
 
 
@@ -40,8 +41,10 @@ class Controller():
 		# These methods also store their respective parameters
 		self._sampler_methods = {}
 
-		# Store the parameters to distribute to different simulation runs
-		self._all_parameter_combinations = []
+		# Store the parameters to distribute to different simulation runs.
+		# Combinations are never stored but generated on demand from the factors
+		# of all sampler methods (see _iter_parameter_combinations).
+		self._parameter_factors = []
 		self._all_parameter_descr = []
 
 		self._define_file_and_folder_values(project_folder, project_binary_name, xml_file, additional_files)
@@ -58,9 +61,6 @@ class Controller():
 			raise FileNotFoundError("Could not find " + project_folder + " anywhere. Evaluate input folder and its location.")
 		
 		# Where is the project and its definition xml saved
-		# TODO at beginning read xml file and then never again to avoid conflicts
-		# modify parameter class to then alter memory-stored xml_file contents
-
 		# Check the xml input path
 		xml_input = Path(xml_file)
 		xml_input_path = self._project_folder / xml_input
@@ -74,6 +74,8 @@ class Controller():
 			# xml_input / self._project_folder
 		else:
 			raise FileNotFoundError("Could not find " + xml_file + " anywhere. Evaluate input file and its location.")
+		# The xml file is read once here and never again. All parameters point into this document.
+		self._document = ConfigDocument(self._xml_file_path)
 		
 		# To come back after single simulations are done in the subdirs
 		self._base_dir = Path.cwd()
@@ -148,7 +150,7 @@ class Controller():
 
 	def add_variable_param(self, name:str, param_type:type, node_structure:list, info:dict, method_name:str, logfile:Path=None):
 		'''Adds a parameter with given values to iterate over in simulation.'''
-		param = Parameter(param_type=param_type, xml_file=self._xml_file_path, node_structure=node_structure, logfile=logfile)
+		param = Parameter(param_type=param_type, node_structure=node_structure, logfile=logfile, document=self._document)
 		self._check_param_present(name, param_type, node_structure, info, method_name, logfile)
 		samplerMethod = self._sampler_methods[method_name]
 		samplerMethod.add_param(param_name=name, param=param, info=info)
@@ -157,14 +159,14 @@ class Controller():
 
 	def add_static_param(self, name:str, param_type:type, node_structure:list, logfile:str=None):
 		'''Adds a parameter only used for information purposes and not controlled by a sampler method.'''
-		param = Parameter(param_type=param_type, xml_file=self._xml_file_path, node_structure=node_structure, logfile=logfile)
+		param = Parameter(param_type=param_type, node_structure=node_structure, logfile=logfile, document=self._document)
 		if not self._check_param_present(name, param_type, node_structure, info=None, logfile=logfile):
 			self._params_static[name] = param
 	
 
 	def add_correlated_param(self, name:str, param_type:type, node_structure:list, logfile:Path=None):
 		'''Adds a parameter which will be correlated and thus obtain its value by calculation from other (stativ/variable) parameters.'''
-		param = Parameter(param_type=param_type, xml_file=self._xml_file_path, node_structure=node_structure, logfile=logfile)
+		param = Parameter(param_type=param_type, node_structure=node_structure, logfile=logfile, document=self._document)
 		if not self._check_param_present(name, param_type, node_structure, info=None):
 			self._params_correlated[name] = param
 
@@ -211,67 +213,77 @@ class Controller():
 
 	def _generate_parameters(self):
 		'''
-		This invokes the different sampler methods and generates parameter
-		configurations based on their sampling methods.
+		This invokes the different sampler methods and collects their outputs.
+		The cartesian product of all collected factors defines every parameter
+		combination but it is never materialized.
 		'''
 		# Stores the "range" of parameters
-		# Ie: [[0.0, 0.1, ... , 0.7], [0.3,0.5],[-3,1,5]]
-		# where [0.0, 0.1, ... , 0.7] corresponds to the picked
-		# values for one particular parameter
-		combined_parameter_values_list = []
-		# Will store all generated parameter pairs
-		combs = []
+		# Ie: [([(0.0,), (0.1,), ... , (0.7,)], ["a"]), ([(0.3, -3), (0.5, 1)], ["b", "c"])]
+		# where every factor holds rows of values for the parameters it describes
+		factors = []
 		# Also store description for each parameter
 		descr = []
 		# Iterate over sampler methods and let them choose parameters
 		for s_m_name in self._sampler_methods.keys():
-			values, param_names = self._sampler_methods[s_m_name].generate_combinations()
-			# Append the generated parameter values to the list (and description)
-			combined_parameter_values_list.append(values)
-			descr.append(param_names)
-		# Create the cartesian product and flatten it (see _flatten method)
-		combs = list(itertools.product(*combined_parameter_values_list))
-		# Store results
-		self._all_parameter_combinations = [list(self._flatten(c)) for c in combs]
-		self._all_parameter_descr = list(self._flatten(descr))
-		self._generate_correlated_params()
-
-
-	def _flatten(self, L):
-		'''
-		Used to flatten generated parameter pairs if multiple sampler methods are involved.
-		Ie. go from [(1,2,3),((4),5), (6)] -> [1,2,3,4,5,6].
-		'''
-		for l in L:
-			if isinstance(l, list) or isinstance(l, tuple):
-				yield from self._flatten(l)
-			else:
-				yield l
+			for values, param_names in self._sampler_methods[s_m_name].generate_factors():
+				factors.append((values, param_names))
+				descr += list(param_names)
+		# Correlated parameters are appended behind the sampled ones
+		for params_static, params_variable, params_result, correlation_func in self._correlation_info:
+			descr += params_result
+		self._parameter_factors = factors
+		self._all_parameter_descr = descr
+
+
+	def _count_parameter_combinations(self) -> int:
+		'''Total number of parameter combinations without generating them.'''
+		total = 1
+		for values, param_names in self._parameter_factors:
+			total *= len(values)
+		return total
 
 
-	def _generate_correlated_params(self):
+	def _iter_parameter_combinations(self, start:int=0, stop:int=None):
+		'''
+		Lazily yields (index, combination) for all combinations with start <= index < stop.
+		The index is decoded into one row per factor in the same order as itertools.product
+		would generate them. Correlated parameters are appended to every combination.
+		'''
+		total = self._count_parameter_combinations()
+		if stop == None or stop > total:
+			stop = total
+		for k in range(max(0, start), stop):
+			rows = []
+			rest = k
+			for values, param_names in reversed(self._parameter_factors):
+				rest, i = divmod(rest, len(values))
+				rows.append(values[i])
+			comb = []
+			for row in reversed(rows):
+				comb += list(row)
+			comb += self._generate_correlated_params(comb)
+			yield k, comb
+
+
+	def _generate_correlated_params(self, comb:list) -> list:
 		'''
 		Part of the parameter generation routine that calculates the determined
-		correlated parameters and adds them to the parameter list.
+		correlated parameters for one sampled combination.
 		This does not increase the total amount of combinations.
 		'''
-		# Append the correlated parameters for every parameter combination which was sampled so far.
-		for i in range(len(self._all_parameter_combinations)):
-			# Those sampled entries are seperated by the methods that sampled them
-			for params_static, params_variable, params_result, correlation_func in self._correlation_info:
-				if not set(params_result) <= set(self._all_parameter_descr):
-					self._all_parameter_descr += params_result
-				res = self._eval_correlation_func(params_static, params_variable, i, correlation_func)
-				self._all_parameter_combinations[i]+=res
+		res = []
+		for params_static, params_variable, params_result, correlation_func in self._correlation_info:
+			res += self._eval_correlation_func(params_static, params_variable, comb, correlation_func)
+		return res
 
 
-	def _eval_correlation_func(self, params_static:list, params_variable:list, param_index:int, correlation_func) -> list:
+	def _eval_correlation_func(self, params_static:list, params_variable:list, comb:list, correlation_func) -> list:
 		'''
 		Used to calculate the correlation function in the process to determine
 		the correlated parameters in the parameter generation routine.
 		'''
 		params_static_values = [self._params_static[p].get_val() for p in params_static]
-		params_variable_values = [param_val for i, param_val in enumerate(self._all_parameter_combinations[param_index]) if self._all_parameter_descr[i] in params_variable]
+		params_variable_values = [param_val for i, param_val in enumerate(comb) if self._all_parameter_descr[i] in params_variable]
 		res = correlation_func(*params_static_values, *params_variable_values)
 		return res
 	
@@ -303,12 +315,14 @@ class Controller():
 	def _write_xml(self, comb:tuple, xml_file_name:Path, params:list, params_variable_correlated:list):
 		'''
 		Write the supplied parameter combination to the xml file.
+		All values are applied in memory and the file is serialized only once.
 		'''
-		# Update the xml file and logfile in the parameters
-		for i, param in enumerate(params):
-			param.update_file_locations(xml_file=xml_file_name, logfile=Path("logs/param_logs.txt"))
-			# Now write params to file
-			param.set_val(param.param_type(comb[i]))
+		assignments = [(param, param.param_type(comb[i])) for i, param in enumerate(params)]
+		params[0].document.render(xml_file_name, assignments)
+		logfile = open(Path("logs/param_logs.txt"), "a")
+		for param, value in assignments:
+			print("[param_set] Set parameter of type " + str(param.param_type) + " with node structure " + str(param.node_structure) + " in xml_file \"" + str(xml_file_name) + "\" to " + str(value), file=logfile)
+		logfile.close()
 
 
 	def _run_sim(self, project_binary_name:Path):
@@ -363,15 +377,15 @@ class Controller():
 		return 1
 
 
-	def run(self, output_dir="./output/"):
-		'''
-		
-		'''
-		self._generate_parameters()
-		
-		# Create list with all tasks (= Parameter combinations + information)
-		tasks = []
-		for k, comb in enumerate(self._all_parameter_combinations):
+	def _iter_tasks(self, start:int=0, stop:int=None):
+		'''Lazily creates the task dictionaries (= Parameter combinations + information).'''
+		# Check if a post simulation command was supplied and if so append its information to the task dictionary.
+		if self._post_sim_script_command != None:
+			post_sim_info = {"command":self._post_sim_script_command, "files":self._post_sim_script_files, "folder":self._post_sim_script_folder}
+		else:
+			post_sim_info = None
+
+		for k, comb in self._iter_parameter_combinations(start, stop):
 			qarams = []
 			qarams_variable_correlated = []
 			
@@ -384,14 +398,8 @@ class Controller():
 				qaram = param.__copy__()
 				qarams.append(qaram)
 			
-			# Check if a post simulation command was supplied and if so append its information to the task dictionary.
-			if self._post_sim_script_command != None:
-				post_sim_info = {"command":self._post_sim_script_command, "files":self._post_sim_script_files, "folder":self._post_sim_script_folder}
-			else:
-				post_sim_info = None
-			
 			# Create a task entry with all information
-			tasks.append({
+			yield {
 				"param_comb":comb,
 				"save_dir":self.save_dir,
 				"xml_file_name":self._xml_file_name,
@@ -402,11 +410,43 @@ class Controller():
 				"params_variable_correlated":qarams_variable_correlated,
 				"post_sim_info":post_sim_info,
 				"folder_count":k
-			})
+			}
+
+
+	def run(self, output_dir="./output/", start:int=0, stop:int=None):
+		'''
+		Runs all parameter combinations with start <= index < stop.
+		Tasks are generated while the simulations are running and only a
+		few more than parallel_sims are held in memory at any time.
+		'''
+		self._generate_parameters()
+		total = self._count_parameter_combinations()
+		if stop == None or stop > total:
+			stop = total
+		start = max(0, start)
+
+		# The pool consumes its input in a separate thread as fast as it can.
+		# This window blocks the generator until results have been collected.
+		window = threading.Semaphore(2*max(1,self.threads))
+		stop_feeding = threading.Event()
+		def feed():
+			for task in self._iter_tasks(start, stop):
+				window.acquire()
+				if stop_feeding.is_set():
+					return
+				yield task
 
 		# Create pool (with multiple processes)
 		pool = mp.Pool(max(1,self.threads))
 
 		# Execute tasks
-		with pool as p:
-			r = list(tqdm(p.imap(self._run_single_sim, tasks), total=len(tasks)))
+		r = []
+		try:
+			with pool as p:
+				for res in tqdm(p.imap(self._run_single_sim, feed()), total=max(0, stop-start)):
+					r.append(res)
+					window.release()
+		finally:
+			# Unblock the feeding thread so that the pool can shut down
+			stop_feeding.set()
+			window.release()
@@ -4,7 +4,7 @@ import unittest
 
 
 # Import tests for SimController
-from test.test_Parameter import testGet, testSet, testNodeStructure, testUpdateFileLocations
+from test.test_Parameter import testGet, testSet, testNodeStructure, testUpdateFileLocations, testSharedDocument
 from test.test_SimController import SimController
 
 # Test all parts in main function
@@ -15,6 +15,7 @@ if __name__ == "__main__":
     suite_Parameter.addTest(testSet)
     suite_Parameter.addTest(testNodeStructure)
     suite_Parameter.addTest(testUpdateFileLocations)
+    suite_Parameter.addTest(testSharedDocument)
 
     suite_SimController = unittest.TestSuite()
     suite_SimController.addTest(SimController)
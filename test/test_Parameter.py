@@ -7,6 +7,7 @@ import xml.etree.ElementTree as ET
 
 
 from src.Parameter import Parameter
+from src.ConfigDocument import ConfigDocument
 # from SimController import Controller, Parameter
 
 class testGet(unittest.TestCase):
@@ -247,10 +248,62 @@ class testNodeStructure(unittest.TestCase):
 
 class testUpdateFileLocations(unittest.TestCase):
 
-	# TODO write this test
 	# First set parameter to use certain file, then switch and check if get/set still works
 	def test_update_file_locations(self):
-		typs = [float, int, str, bool]
+		filename_1 = "test/xml_files/test_update_file_locations_1.xml"
+		filename_2 = "test/xml_files/test_update_file_locations_2.xml"
+		for filename, values in [(filename_1, ("1", "2")), (filename_2, ("3", "4"))]:
+			file = open(filename, "w")
+			file.write("<root>\n\t<a>" + values[0] + "</a>\n\t<a>" + values[1] + "</a>\n</root>\n")
+			file.close()
+
+		param = Parameter(param_type=int, xml_file=filename_1, node_structure=[{"node":"a", "index":1}])
+		self.assertEqual(2, param.get_val())
+		param.update_file_locations(filename_2)
+		self.assertEqual(4, param.get_val())
+		param.set_val(5)
+		self.assertEqual("5", ET.parse(filename_2).findall("a")[1].text)
+		self.assertEqual("2", ET.parse(filename_1).findall("a")[1].text)
+
+
+class testSharedDocument(unittest.TestCase):
+
+	def test_set_in_memory(self):
+		'''Parameters sharing a document only change the file once the document is rendered.'''
+		filename = "test/xml_files/test_shared_document.xml"
+		target = "test/xml_files/test_shared_document_rendered.xml"
+		file = open(filename, "w")
+		file.write("<root>\n\t<a>1</a>\n\t<b>2.5</b>\n</root>\n")
+		file.close()
+
+		document = ConfigDocument(filename)
+		param_a = Parameter(param_type=int, node_structure=["a"], document=document)
+		param_b = Parameter(param_type=float, node_structure=["b"], document=document)
+		param_a.set_val(7)
+		self.assertEqual(7, param_a.get_val())
+		self.assertEqual("1", ET.parse(filename).find("a").text)
+
+		document.render(target, [(param_a, 3), (param_b, 0.5)])
+		self.assertEqual("3", ET.parse(target).find("a").text)
+		self.assertEqual("0.5", ET.parse(target).find("b").text)
+		self.assertEqual("1", ET.parse(filename).find("a").text)
+
+	def test_compiled_path(self):
+		'''Compiled index paths resolve to the same node in copies of the template.'''
+		document = ConfigDocument("test/xml_files/test_get_float.xml")
+		node_structure = [{"node":"cell_definitions"}, {"node":"cell_definition", "index":1}, "phenotype", {"node":"cycle", "attributes":{"code":"5"}}, "phase_transition_rates", "rate"]
+		param = Parameter(param_type=float, node_structure=node_structure, document=document)
+		self.assertEqual(1, len(document.compiled_paths))
+		# Identical node structures are not searched again
+		param_copy = param.__copy__()
+		Parameter(param_type=float, node_structure=list(node_structure), document=document)
+		self.assertEqual(1, len(document.compiled_paths))
+		self.assertEqual(param.path, param_copy.path)
+
+		document_copy = document.copy()
+		node = param.resolve_in(document_copy)
+		self.assertIsNot(node, param.node)
+		self.assertEqual(float(node.text), param.get_val())
 
 
 if __name__ == "__main__":
@@ -1,8 +1,17 @@
 #!/bin/python
 
 import unittest
+import itertools
+import tempfile
+import xml.etree.ElementTree as ET
+from pathlib import Path
 
 from src.SimController import Controller
+from src.SamplerMethods import Linear
+
+
+def create_controller(save_dir, **kwargs):
+    return Controller("test/stub_project", "stub_binary", "config/PhysiCell_settings.xml", save_dir=save_dir, **kwargs)
 
 
 # TODO write tests for all important user functions of SimController class
@@ -27,4 +36,43 @@ class SimController(unittest.TestCase):
         pass
 
     def test_run(self):
-        pass
\ No newline at end of file
+        pass
+
+
+class ParameterGeneration(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cont = create_controller(self.tmp.name)
+        self.cont.add_sampler_method("Linear", Linear)
+        self.cont.add_variable_param(name="dx", param_type=int, node_structure=["domain", "dx"], info={"bound_low":10, "bound_high":35, "increment":10}, method_name="Linear")
+        self.cont.add_variable_param(name="dy", param_type=int, node_structure=["domain", "dy"], info={"bound_low":10, "bound_high":25, "increment":10}, method_name="Linear")
+        self.cont.add_static_param(name="x_max", param_type=float, node_structure=["domain", "x_max"])
+        self.cont.add_correlated_param("dz", int, ["domain", "dz"])
+        self.cont.correlate_params(params_static=["x_max"], params_variable=["dx", "dy"], params_result=["dz"], correlation_func=lambda x_max, dx, dy: [int(dx+dy)])
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_iter_parameter_combinations(self):
+        '''Lazily generated combinations follow the order of the cartesian product.'''
+        self.cont._generate_parameters()
+        self.assertEqual(["dx", "dy", "dz"], self.cont._all_parameter_descr)
+        self.assertEqual(6, self.cont._count_parameter_combinations())
+        expected = [[dx, dy, dx+dy] for dx, dy in itertools.product([10, 20, 30], [10, 20])]
+        combs = [comb for k, comb in self.cont._iter_parameter_combinations()]
+        self.assertEqual(expected, [[int(v) for v in comb] for comb in combs])
+        # Slicing by index range
+        sliced = list(self.cont._iter_parameter_combinations(2, 5))
+        self.assertEqual([2, 3, 4], [k for k, comb in sliced])
+        self.assertEqual(expected[2:5], [[int(v) for v in comb] for k, comb in sliced])
+
+    def test_run(self):
+        '''Every combination gets its own run directory with the rendered xml.'''
+        self.cont.run()
+        for k, comb in self.cont._iter_parameter_combinations():
+            run_dir = Path(self.tmp.name) / ("run_" + '{:0>10}'.format(k))
+            tree = ET.parse(run_dir / "config/PhysiCell_settings.xml")
+            self.assertEqual(str(int(comb[0])), tree.find("domain/dx").text)
+            self.assertEqual(str(int(comb[2])), tree.find("domain/dz").text)
+            self.assertTrue((run_dir / "output/final.txt").is_file())